@@ -5,20 +5,34 @@ For apple-to-apple comparison with Pi Agent SDK
 """
 
 import asyncio
+import contextlib
+import functools
+import hashlib
 import json
 import os
+import re
 import time
-import boto3
+from collections.abc import Awaitable
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
 import anthropic
+import httpx
+
+try:
+    import orjson
+except ImportError:  # optional, only speeds up writing results
+    orjson = None  # type: ignore[assignment]
 
 RESULTS_DIR = Path(__file__).parent.parent / "results"
 RESULTS_DIR.mkdir(exist_ok=True)
 
 SAMPLE_CODE_DIR = Path(__file__).parent.parent / "sample-code"
 
+CACHE_DIR = RESULTS_DIR / ".cache"
+
+OUTPUT_PATH = RESULTS_DIR / "anthropic-bedrock-results.json"
+
 
 @dataclass
 class TestResult:
@@ -33,10 +47,23 @@ class TestResult:
     duration_ms: int
     success: bool
     error: str | None = None
+    latency_mode: str = "standard"
+    cached: bool = False
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    started_at: float = 0.0
+    batched: bool = False
+    max_tokens: int = 8192
 
 
 results: list[TestResult] = []
 
+# asdict() of each entry in results, converted once when the test finishes
+result_dicts: list[dict] = []
+
+# Passing results from a previous run, reused instead of re-running (RESUME=1)
+completed: dict[str, TestResult] = {}
+
 # Model to use (Opus 4.5 on Bedrock via global inference profile)
 # Must use inference profile, not direct model ID
 MODEL = "us.anthropic.claude-opus-4-5-20251101-v1:0"
@@ -44,77 +71,518 @@ MODEL = "us.anthropic.claude-opus-4-5-20251101-v1:0"
 # Bedrock pricing for Opus 4.5 (per 1M tokens)
 INPUT_PRICE_PER_1M = 15.00
 OUTPUT_PRICE_PER_1M = 75.00
+INPUT_PRICE_PER_TOKEN = INPUT_PRICE_PER_1M / 1_000_000
+OUTPUT_PRICE_PER_TOKEN = OUTPUT_PRICE_PER_1M / 1_000_000
+
+# Prompt-cache reads bill at 10% of the input price, 5-minute cache writes at 125%
+CACHE_READ_PRICE_PER_TOKEN = INPUT_PRICE_PER_TOKEN * 0.1
+CACHE_WRITE_PRICE_PER_TOKEN = INPUT_PRICE_PER_TOKEN * 1.25
+
+# Bedrock latency-optimized inference, opt-in so runs can be A/B compared.
+# InvokeModel takes this as a request header rather than a body field.
+LATENCY_MODE = "optimized" if os.environ.get("BEDROCK_LATENCY_OPTIMIZED") == "1" else "standard"
+LATENCY_HEADERS = (
+    {"X-Amzn-Bedrock-PerformanceConfig-Latency": LATENCY_MODE}
+    if LATENCY_MODE == "optimized"
+    else None
+)
+
+# Extended thinking settings for tests that request it
+THINKING: anthropic.types.ThinkingConfigEnabledParam = {"type": "enabled", "budget_tokens": 4096}
+
+# Pack the batchable quick tests into a single request (trades RPM for TPM)
+BATCH_PROMPTS = os.environ.get("BATCH_PROMPTS") == "1"
+BATCH_DELIMITER = re.compile(r"<<<TASK (\d+)>>>")
+
+# Client-side throttling to stay inside Bedrock quotas (0 or less = unlimited)
+BEDROCK_RPM = float(os.environ.get("BEDROCK_RPM", "0"))
+BEDROCK_TPM = float(os.environ.get("BEDROCK_TPM", "0"))
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get("BEDROCK_MAX_CONCURRENCY", "5"))
+
+# SDK retries with jittered exponential backoff on 408/409/429/5xx and
+# connection errors (Bedrock ThrottlingException is a 429); other 4xx fail fast
+MAX_RETRIES = 5
+
+# Print a streaming progress line every N text/thinking deltas
+STREAM_PROGRESS_EVERY = 200
+
+# Shared by every test, so mark it as a prompt-cache breakpoint. Bedrock only
+# caches a prefix of at least 1024 tokens (4096 for Opus 4.5), far more than
+# any prompt here, so the cache token counts stay 0 until prompts grow
+SYSTEM_PROMPT: list[anthropic.types.TextBlockParam] = [
+    {
+        "type": "text",
+        "text": "You are a helpful coding assistant. Be concise and precise.",
+        "cache_control": {"type": "ephemeral"},
+    }
+]
 
 print("=" * 60)
 print("Anthropic Python SDK Test Suite (Bedrock)")
 print(f"Model: {MODEL}")
+print(f"Latency mode: {LATENCY_MODE}")
+print(
+    f"Max concurrency: {BEDROCK_MAX_CONCURRENCY if BEDROCK_MAX_CONCURRENCY > 0 else 'unlimited'} "
+    f"(RPM: {BEDROCK_RPM if BEDROCK_RPM > 0 else 'unlimited'}, "
+    f"TPM: {BEDROCK_TPM if BEDROCK_TPM > 0 else 'unlimited'})"
+)
 print("=" * 60)
 
 
-def calculate_cost(input_tokens: int, output_tokens: int) -> float:
-    """Calculate cost based on Bedrock pricing."""
-    input_cost = (input_tokens / 1_000_000) * INPUT_PRICE_PER_1M
-    output_cost = (output_tokens / 1_000_000) * OUTPUT_PRICE_PER_1M
-    return input_cost + output_cost
+def calculate_cost(
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_creation_tokens: int = 0,
+) -> float:
+    """Calculate cost based on Bedrock pricing.
+
+    ``input_tokens`` excludes prompt-cache reads and writes, which are billed
+    separately at their own rates.
+    """
+    if not (input_tokens or output_tokens or cache_read_tokens or cache_creation_tokens):
+        return 0.0
+    return (
+        input_tokens * INPUT_PRICE_PER_TOKEN
+        + output_tokens * OUTPUT_PRICE_PER_TOKEN
+        + cache_read_tokens * CACHE_READ_PRICE_PER_TOKEN
+        + cache_creation_tokens * CACHE_WRITE_PRICE_PER_TOKEN
+    )
+
+
+def write_json(path: Path, data) -> None:
+    """Write ``data`` as indented JSON, using orjson when it is installed.
+
+    The file is written to a sibling ``.tmp`` path and swapped into place, so a
+    crash mid-write never leaves it truncated.
+    """
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    if orjson is not None:
+        tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_sample(name: str) -> str:
+    """Read a sample-code file once and reuse it for every later call."""
+    return (SAMPLE_CODE_DIR / name).read_text(encoding="utf-8")
+
+
+class ResponseCache:
+    """Exact-match cache of successful responses, stored as a JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, dict] = (
+            json.loads(path.read_bytes()) if path.exists() else {}
+        )
+
+    @staticmethod
+    def key(**request) -> str:
+        """Hash the request fields that determine the response."""
+        payload = json.dumps(request, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: dict) -> None:
+        self.entries[key] = value
+        self.path.parent.mkdir(exist_ok=True)
+        write_json(self.path, self.entries)
+
+
+# Opt-in so that benchmark runs measure live responses by default
+cache = ResponseCache(CACHE_DIR / "responses.json") if os.environ.get("LLM_CACHE") == "1" else None
+
+
+class TokenBucket:
+    """Refills continuously at ``per_minute`` units per minute, up to one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.available = per_minute
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 if it already is)."""
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (min(amount, self.capacity) - self.available) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.available -= min(amount, self.capacity)
+
+
+class AsyncLimiter:
+    """Proactive throttle: caps in-flight requests and paces requests and
+    input tokens per minute, so calls wait locally instead of hitting 429s."""
+
+    def __init__(self, requests_per_min: float, tokens_per_min: float, max_concurrency: int):
+        # Any limit of 0 or less is unlimited; Semaphore(0) would block forever
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.lock = asyncio.Lock()
+        self.requests = TokenBucket(requests_per_min) if requests_per_min > 0 else None
+        self.tokens = TokenBucket(tokens_per_min) if tokens_per_min > 0 else None
+
+    async def acquire(self, input_tokens: int) -> None:
+        # The lock hands out capacity in arrival order
+        async with self.lock:
+            while True:
+                wait = max(
+                    self.requests.wait_time(1) if self.requests else 0.0,
+                    self.tokens.wait_time(input_tokens) if self.tokens else 0.0,
+                )
+                if wait == 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(input_tokens)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, input_tokens: int):
+        """Hold one concurrency slot once the rate budgets allow the request."""
+        async with self.semaphore or contextlib.nullcontext():
+            await self.acquire(input_tokens)
+            yield
+
+
+limiter = AsyncLimiter(BEDROCK_RPM, BEDROCK_TPM, BEDROCK_MAX_CONCURRENCY)
+
+
+@dataclass
+class Completion:
+    text: str
+    usage: anthropic.types.Usage
+    duration_ms: int
+    batched: bool = False
+
+
+class MissingBatchAnswer(Exception):
+    """A packed task got no answer; ``completion`` still carries its billed share."""
+
+    def __init__(self, task: int, completion: Completion):
+        super().__init__(f"Task {task} missing from batched response")
+        self.completion = completion
+
+
+def estimate_input_tokens(content: str) -> int:
+    """Rough input size (~4 characters per token) for the TPM budget."""
+    system = "".join(block["text"] for block in SYSTEM_PROMPT)
+    return (len(system) + len(content)) // 4
+
+
+class WarmUp:
+    """Sends one 1-token request before the first request that reaches Bedrock.
+
+    DNS, TLS and credential setup then happen outside the timed requests. Runs
+    whose tests are all resumed or replayed from the cache never send it.
+    """
+
+    def __init__(self):
+        self.task: asyncio.Task | None = None
 
+    async def wait(self, client: anthropic.AsyncAnthropicBedrock) -> None:
+        # Every test that starts while the warm-up is in flight waits for it
+        if self.task is None:
+            print("Warming up connection...")
+            self.task = asyncio.create_task(self.send(client))
+        await self.task
 
-def run_test(
-    client: anthropic.AnthropicBedrock,
+    @staticmethod
+    async def send(client: anthropic.AsyncAnthropicBedrock) -> None:
+        try:
+            async with limiter.slot(1):
+                await client.messages.create(
+                    model=MODEL,
+                    max_tokens=1,
+                    messages=[{"role": "user", "content": "Hi"}],
+                    extra_headers=LATENCY_HEADERS,
+                )
+        except Exception as e:
+            print(f"Warm-up request failed, continuing: {e}")
+
+
+warm_up = WarmUp()
+
+
+async def stream_response(
+    client: anthropic.AsyncAnthropicBedrock,
+    label: str,
+    content: str,
+    max_tokens: int,
+    thinking: bool = False,
+) -> Completion:
+    """Stream one request and return the assembled text and final usage.
+
+    The duration covers the request itself, not time spent queued on the limiter.
+    """
+    await warm_up.wait(client)
+
+    # Collect deltas and join them once at the end
+    parts: list[str] = []
+    deltas = 0
+    async with limiter.slot(estimate_input_tokens(content)):
+        start_ns = time.perf_counter_ns()
+        async with client.messages.stream(
+            model=MODEL,
+            max_tokens=max_tokens,
+            system=SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": content}],
+            thinking=THINKING if thinking else anthropic.omit,
+            extra_headers=LATENCY_HEADERS,
+        ) as stream:
+            async for event in stream:
+                if event.type == "content_block_start" and event.content_block.type == "thinking":
+                    parts.append("[THINKING]\n")
+                elif event.type == "content_block_stop" and event.content_block.type == "thinking":
+                    parts.append("\n[/THINKING]\n")
+                elif event.type == "content_block_delta":
+                    if event.delta.type == "text_delta":
+                        parts.append(event.delta.text)
+                    elif event.delta.type == "thinking_delta":
+                        parts.append(event.delta.thinking)
+                    else:
+                        continue
+                    deltas += 1
+                    if deltas % STREAM_PROGRESS_EVERY == 0:
+                        print(f"  [{label}] {deltas} chunks received...")
+            response = await stream.get_final_message()
+        duration_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+    return Completion("".join(parts), response.usage, duration_ms)
+
+
+def _apportion(total: int, weights: list[int]) -> list[int]:
+    """Split an integer total in proportion to weights, preserving the sum."""
+    weight_sum = sum(weights) or 1
+    shares = [total * w // weight_sum for w in weights]
+    # The rounding remainder goes to the heaviest share, never a zero-weight one
+    shares[weights.index(max(weights))] += total - sum(shares)
+    return shares
+
+
+class PromptBatch:
+    """Packs batchable prompts into a single request (BATCH_PROMPTS=1).
+
+    Prompts submitted before the event loop next gets to run the flush task
+    (i.e. all batchable tests started by the same gather) are sent together,
+    separated by <<<TASK k>>> delimiters. Usage is attributed to each task in
+    proportion to its prompt length (input) and answer length (output). Every
+    task reports the full request duration, since each waited for all of it.
+    """
+
+    def __init__(self):
+        self.pending: list[tuple[str, int, asyncio.Future]] = []
+        self.flush_task: asyncio.Task | None = None
+
+    async def submit(
+        self,
+        client: anthropic.AsyncAnthropicBedrock,
+        prompt: str,
+        max_tokens: int,
+    ) -> Completion:
+        if not self.pending:
+            self.flush_task = asyncio.create_task(self.flush(client))
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((prompt, max_tokens, future))
+        return await future
+
+    async def flush(self, client: anthropic.AsyncAnthropicBedrock) -> None:
+        batch, self.pending = self.pending, []
+        try:
+            await self.send(client, batch)
+        except Exception as e:
+            # Fail every test still waiting rather than leaving it hanging
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def send(
+        self,
+        client: anthropic.AsyncAnthropicBedrock,
+        batch: list[tuple[str, int, asyncio.Future]],
+    ) -> None:
+        prompts = [prompt for prompt, _, _ in batch]
+        futures = [future for _, _, future in batch]
+
+        # A lone prompt goes out as-is; there is nothing to pack
+        if len(batch) == 1:
+            futures[0].set_result(
+                await stream_response(client, "batch", prompts[0], batch[0][1])
+            )
+            return
+
+        tasks = "\n\n".join(
+            f"<<<TASK {k}>>>\n{prompt}" for k, prompt in enumerate(prompts, 1)
+        )
+        content = (
+            f"Answer each of the following {len(batch)} tasks. Separate answers with "
+            "<<<TASK k>>> delimiters, starting each answer with the delimiter of "
+            f"the task it answers.\n\n{tasks}"
+        )
+        max_tokens = sum(tokens for _, tokens, _ in batch)
+        completion = await stream_response(
+            client, f"batch of {len(batch)}", content, max_tokens
+        )
+
+        usage = completion.usage
+        pieces = BATCH_DELIMITER.split(completion.text)
+        answers = {int(k): answer.strip() for k, answer in zip(pieces[1::2], pieces[2::2])}
+        ordered = [answers.get(k, "") for k in range(1, len(batch) + 1)]
+
+        prompt_weights = [len(prompt) for prompt in prompts]
+        tokens_in = _apportion(usage.input_tokens, prompt_weights)
+        cache_read = _apportion(usage.cache_read_input_tokens or 0, prompt_weights)
+        cache_creation = _apportion(usage.cache_creation_input_tokens or 0, prompt_weights)
+        answer_weights = [len(answer) for answer in ordered]
+        tokens_out = _apportion(usage.output_tokens, answer_weights)
+
+        for k, future in enumerate(futures):
+            share = Completion(
+                ordered[k],
+                anthropic.types.Usage(
+                    input_tokens=tokens_in[k],
+                    output_tokens=tokens_out[k],
+                    cache_read_input_tokens=cache_read[k],
+                    cache_creation_input_tokens=cache_creation[k],
+                ),
+                completion.duration_ms,
+                batched=True,
+            )
+            if ordered[k]:
+                future.set_result(share)
+            else:
+                # Its prompt was still billed, so report that usage with the failure
+                future.set_exception(MissingBatchAnswer(k + 1, share))
+
+
+prompt_batch = PromptBatch() if BATCH_PROMPTS else None
+
+
+async def run_test(
+    client: anthropic.AsyncAnthropicBedrock,
     test_name: str,
     prompt: str,
     thinking: bool = False,
+    batchable: bool = False,
+    max_tokens: int = 2048,
 ) -> TestResult:
-    """Run a single test with the Anthropic SDK via Bedrock."""
-    print(f"\n[TEST] {test_name}")
-    print("-" * 40)
-
-    start_time = time.time()
+    """Run a single test with the Anthropic SDK via Bedrock.
+
+    Tests marked ``batchable`` (plain prompts, no thinking) share one request
+    when BATCH_PROMPTS=1. ``max_tokens`` is sized per test from its typical
+    output length, leaving headroom.
+    """
+    if test_name in completed:
+        print(f"\n[SKIP] {test_name} (passed in previous run)")
+        return completed[test_name]
+
+    # Wall-clock start for log correlation; durations use the monotonic clock
+    started_at = time.time()
+    start_ns = time.perf_counter_ns()
     response_text = ""
     tokens_in = 0
     tokens_out = 0
+    cache_read_tokens = 0
+    cache_creation_tokens = 0
     cost = 0.0
     success = True
     error: str | None = None
+    cached_entry: dict | None = None
+    duration_ms: int | None = None
+    completion: Completion | None = None
+    batch = prompt_batch if batchable else None
+    batched = False
+
+    def key(batched: bool) -> str:
+        return ResponseCache.key(
+            model=MODEL,
+            system=SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": prompt}],
+            thinking=thinking,
+            max_tokens=max_tokens,
+            batched=batched,
+            # The latency header changes the measured duration, so A/B runs
+            # must never replay each other's entries
+            latency_mode=LATENCY_MODE,
+        )
 
     try:
-        # Build request parameters
-        params = {
-            "model": MODEL,
-            "max_tokens": 8192,
-            "system": "You are a helpful coding assistant. Be concise and precise.",
-            "messages": [{"role": "user", "content": prompt}],
-        }
-
-        # Add thinking if requested
-        if thinking:
-            params["thinking"] = {
-                "type": "enabled",
-                "budget_tokens": 4096
-            }
-
-        response = client.messages.create(**params)
-
-        # Extract response content
-        for block in response.content:
-            if block.type == "text":
-                response_text += block.text
-            elif block.type == "thinking":
-                response_text += f"[THINKING]\n{block.thinking}\n[/THINKING]\n"
-
-        # Extract usage
-        tokens_in = response.usage.input_tokens
-        tokens_out = response.usage.output_tokens
-        cost = calculate_cost(tokens_in, tokens_out)
-
+        if cache:
+            # A batch-eligible test may have been packed or sent alone last time
+            for batched in ([True, False] if batch is not None else [False]):
+                cached_entry = cache.get(key(batched))
+                if cached_entry:
+                    break
+
+        if cached_entry:
+            # Replay the stored response; nothing is billed for a cache hit
+            response_text = cached_entry["response"]
+            tokens_in = cached_entry["tokens_in"]
+            tokens_out = cached_entry["tokens_out"]
+            cache_read_tokens = cached_entry.get("cache_read_tokens", 0)
+            cache_creation_tokens = cached_entry.get("cache_creation_tokens", 0)
+        elif batch is not None:
+            completion = await batch.submit(client, prompt, max_tokens)
+        else:
+            completion = await stream_response(client, test_name, prompt, max_tokens, thinking)
+        if completion is not None:
+            response_text = completion.text
+
+    except MissingBatchAnswer as e:
+        # Keep the task's share of the batch so its billed tokens still count
+        success = False
+        error = str(e)
+        response_text = f"ERROR: {error}"
+        completion = e.completion
     except Exception as e:
         success = False
         error = str(e)
         response_text = f"ERROR: {error}"
 
-    duration_ms = int((time.time() - start_time) * 1000)
-
+    if completion is not None:
+        batched = completion.batched
+        duration_ms = completion.duration_ms
+
+        # Extract usage (input_tokens excludes prompt-cache reads and writes)
+        usage = completion.usage
+        tokens_in = usage.input_tokens
+        tokens_out = usage.output_tokens
+        cache_read_tokens = usage.cache_read_input_tokens or 0
+        cache_creation_tokens = usage.cache_creation_input_tokens or 0
+        cost = calculate_cost(tokens_in, tokens_out, cache_read_tokens, cache_creation_tokens)
+
+    if cached_entry:
+        # Report the original round-trip time so comparisons stay meaningful
+        duration_ms = cached_entry["duration_ms"]
+    else:
+        if duration_ms is None:
+            # Failed before a response arrived
+            duration_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+        if cache and success:
+            # Keyed by whether packing actually happened, not by eligibility
+            cache.set(key(batched), {
+                "response": response_text,
+                "tokens_in": tokens_in,
+                "tokens_out": tokens_out,
+                "cache_read_tokens": cache_read_tokens,
+                "cache_creation_tokens": cache_creation_tokens,
+                "duration_ms": duration_ms,
+            })
+
+    # Tests run concurrently, so print each report in one go once it finishes
+    print(f"\n[TEST] {test_name}{' (cached)' if cached_entry else ''}{' (batched)' if batched else ''}")
+    print("-" * 40)
     print(f"Duration: {duration_ms}ms")
-    print(f"Tokens: {tokens_in} in / {tokens_out} out")
+    print(f"Tokens: {tokens_in} in / {tokens_out} out (max {max_tokens})")
+    print(f"Prompt cache: {cache_read_tokens} read / {cache_creation_tokens} written")
     print(f"Cost: ${cost:.4f}")
     print(f"Response preview: {response_text[:200]}...")
 
@@ -130,15 +598,22 @@ def run_test(
         duration_ms=duration_ms,
         success=success,
         error=error,
+        latency_mode=LATENCY_MODE,
+        cached=cached_entry is not None,
+        cache_read_tokens=cache_read_tokens,
+        cache_creation_tokens=cache_creation_tokens,
+        started_at=started_at,
+        batched=batched,
+        max_tokens=max_tokens,
     )
 
 
 # ============================================
 # TEST 1: Bug Detection
 # ============================================
-def test_bug_detection(client: anthropic.AnthropicBedrock) -> TestResult:
-    code = (SAMPLE_CODE_DIR / "buggy-calculator.ts").read_text()
-    return run_test(
+async def test_bug_detection(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
+    code = _load_sample("buggy-calculator.ts")
+    return await run_test(
         client,
         "Bug Detection",
         f"Analyse this TypeScript code and identify all bugs. List each bug with line number and explanation:\n\n```typescript\n{code}\n```",
@@ -148,34 +623,37 @@ def test_bug_detection(client: anthropic.AnthropicBedrock) -> TestResult:
 # ============================================
 # TEST 2: Code Refactoring
 # ============================================
-def test_code_refactoring(client: anthropic.AnthropicBedrock) -> TestResult:
-    code = (SAMPLE_CODE_DIR / "api-endpoint.ts").read_text()
-    return run_test(
+async def test_code_refactoring(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
+    code = _load_sample("api-endpoint.ts")
+    return await run_test(
         client,
         "Code Refactoring",
         f"Refactor this TypeScript code to fix the issues listed in the comments. Provide the improved code:\n\n```typescript\n{code}\n```",
+        max_tokens=4096,
     )
 
 
 # ============================================
 # TEST 3: Algorithm Implementation
 # ============================================
-def test_algorithm_implementation(client: anthropic.AnthropicBedrock) -> TestResult:
-    return run_test(
+async def test_algorithm_implementation(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
+    return await run_test(
         client,
         "Algorithm Implementation",
         """Implement a TypeScript function that finds the longest palindromic substring in a string. Include:
 1. The implementation using dynamic programming
 2. Time and space complexity analysis
 3. Example usage with test cases""",
+        batchable=True,
+        max_tokens=4096,
     )
 
 
 # ============================================
 # TEST 4: Complex Reasoning (with thinking)
 # ============================================
-def test_complex_reasoning(client: anthropic.AnthropicBedrock) -> TestResult:
-    return run_test(
+async def test_complex_reasoning(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
+    return await run_test(
         client,
         "Complex Reasoning",
         """A farmer needs to transport a wolf, a goat, and a cabbage across a river. The boat can only carry the farmer and one item at a time. If left alone:
@@ -184,14 +662,15 @@ def test_complex_reasoning(client: anthropic.AnthropicBedrock) -> TestResult:
 
 Find the minimum number of crossings and explain each step.""",
         thinking=True,
+        max_tokens=8192,
     )
 
 
 # ============================================
 # TEST 5: Multi-step Task
 # ============================================
-def test_multi_step_task(client: anthropic.AnthropicBedrock) -> TestResult:
-    return run_test(
+async def test_multi_step_task(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
+    return await run_test(
         client,
         "Multi-step Task",
         """Create a complete TypeScript module for a simple task queue with these features:
@@ -203,13 +682,15 @@ def test_multi_step_task(client: anthropic.AnthropicBedrock) -> TestResult:
 6. Add JSDoc comments
 
 Provide the complete, working code.""",
+        batchable=True,
+        max_tokens=4096,
     )
 
 
 # ============================================
 # TEST 6: Code Review
 # ============================================
-def test_code_review(client: anthropic.AnthropicBedrock) -> TestResult:
+async def test_code_review(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
     code = """
 async function fetchUserData(userId) {
   const response = await fetch(`/api/users/${userId}`);
@@ -241,7 +722,7 @@ class DataProcessor {
     });
   }
 }"""
-    return run_test(
+    return await run_test(
         client,
         "Code Review",
         f"Review this JavaScript code and identify all issues (bugs, bad practices, potential errors). Rate severity (high/medium/low) for each:\n\n```javascript\n{code}\n```",
@@ -251,7 +732,7 @@ class DataProcessor {
 # ============================================
 # NEW TEST 7: SQL Query Optimisation
 # ============================================
-def test_sql_optimisation(client: anthropic.AnthropicBedrock) -> TestResult:
+async def test_sql_optimisation(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
     sql = """
 -- Slow query that needs optimisation
 SELECT
@@ -271,7 +752,7 @@ HAVING SUM(o.total) > 1000
 ORDER BY total_spent DESC
 LIMIT 100;
 """
-    return run_test(
+    return await run_test(
         client,
         "SQL Optimisation",
         f"""Analyse this SQL query and optimise it for better performance. Explain the issues and provide the optimised query with index recommendations:
@@ -285,8 +766,8 @@ LIMIT 100;
 # ============================================
 # NEW TEST 8: API Design
 # ============================================
-def test_api_design(client: anthropic.AnthropicBedrock) -> TestResult:
-    return run_test(
+async def test_api_design(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
+    return await run_test(
         client,
         "API Design",
         """Design a RESTful API for a task management system with the following requirements:
@@ -301,13 +782,15 @@ Provide:
 - Authentication approach
 - Error handling strategy
 - Rate limiting recommendations""",
+        batchable=True,
+        max_tokens=8192,
     )
 
 
 # ============================================
 # NEW TEST 9: Security Audit
 # ============================================
-def test_security_audit(client: anthropic.AnthropicBedrock) -> TestResult:
+async def test_security_audit(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
     code = """
 const express = require('express');
 const mysql = require('mysql');
@@ -346,7 +829,7 @@ app.get('/file', (req, res) => {
 
 app.listen(3000);
 """
-    return run_test(
+    return await run_test(
         client,
         "Security Audit",
         f"""Perform a security audit on this Node.js/Express code. Identify all security vulnerabilities, rate their severity (Critical/High/Medium/Low), and provide fixes:
@@ -354,14 +837,15 @@ app.listen(3000);
 ```javascript
 {code}
 ```""",
+        max_tokens=4096,
     )
 
 
 # ============================================
 # NEW TEST 10: Architecture Decision
 # ============================================
-def test_architecture_decision(client: anthropic.AnthropicBedrock) -> TestResult:
-    return run_test(
+async def test_architecture_decision(client: anthropic.AsyncAnthropicBedrock) -> TestResult:
+    return await run_test(
         client,
         "Architecture Decision",
         """A startup is building a real-time collaboration platform (like Google Docs) with these requirements:
@@ -378,52 +862,91 @@ Compare and recommend architectures:
 4. Message queue selection
 
 Provide a detailed recommendation with trade-offs.""",
+        batchable=True,
+        max_tokens=8192,
     )
 
 
+def load_completed(path: Path) -> dict[str, TestResult]:
+    """Load the passing results of a previous run, keyed by test name."""
+    if not path.exists():
+        return {}
+    previous = [TestResult(**r) for r in json.loads(path.read_bytes())]
+    return {r.test_name: r for r in previous if r.success}
+
+
+def save_results(path: Path) -> None:
+    """Write the current results; ``write_json`` keeps the file intact on a crash."""
+    write_json(path, result_dicts)
+
+
+async def run_and_save(test: Awaitable[TestResult]) -> TestResult:
+    """Await a test and persist all results so far as soon as it finishes."""
+    result = await test
+    results.append(result)
+    result_dicts.append(asdict(result))
+    save_results(OUTPUT_PATH)
+    return result
+
+
 # ============================================
 # RUN ALL TESTS
 # ============================================
-def main() -> None:
+async def main() -> None:
     print("\nInitialising Anthropic Bedrock client...")
 
-    # Get AWS profile from environment or use default
-    aws_profile = os.environ.get("AWS_PROFILE", "default")
+    # Environment overrides only; unset values fall through to the default
+    # botocore credential chain, which refreshes SSO/STS credentials mid-run
+    aws_profile = os.environ.get("AWS_PROFILE")
     aws_region = os.environ.get("AWS_REGION", "us-east-1")
 
-    print(f"Using AWS Profile: {aws_profile}")
+    print(f"Using AWS Profile: {aws_profile or '(default credential chain)'}")
     print(f"Using AWS Region: {aws_region}")
 
-    # Create boto3 session with profile
-    session = boto3.Session(profile_name=aws_profile, region_name=aws_region)
-    credentials = session.get_credentials()
-
-    # Create Bedrock client with explicit credentials
-    client = anthropic.AnthropicBedrock(
+    # Credentials are resolved by the SDK per request rather than copied in once
+    client = anthropic.AsyncAnthropicBedrock(
         aws_region=aws_region,
-        aws_access_key=credentials.access_key,
-        aws_secret_key=credentials.secret_key,
-        aws_session_token=credentials.token,
+        aws_profile=aws_profile,
+        max_retries=MAX_RETRIES,
+        # One keep-alive pool shared by every concurrent test
+        http_client=anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=16),
+            http2=True,
+        ),
     )
 
+    if os.environ.get("RESUME") == "1":
+        completed.update(load_completed(OUTPUT_PATH))
+        print(f"Resuming: {len(completed)} passing tests from previous run")
+
     print("Starting tests...\n")
 
-    results.append(test_bug_detection(client))
-    results.append(test_code_refactoring(client))
-    results.append(test_algorithm_implementation(client))
-    results.append(test_complex_reasoning(client))
-    results.append(test_multi_step_task(client))
-    results.append(test_code_review(client))
-    results.append(test_sql_optimisation(client))
-    results.append(test_api_design(client))
-    results.append(test_security_audit(client))
-    results.append(test_architecture_decision(client))
-
-    # Save results
-    output_path = RESULTS_DIR / "anthropic-bedrock-results.json"
-    with open(output_path, "w") as f:
-        json.dump([asdict(r) for r in results], f, indent=2)
-    print(f"\nResults saved to: {output_path}")
+    # Tests are independent, so run them concurrently: wall time becomes
+    # the slowest single round-trip rather than the sum of all of them.
+    # Each result is saved as it lands, so a crash keeps the tests already paid for.
+    gather_start_ns = time.perf_counter_ns()
+    ordered = await asyncio.gather(
+        run_and_save(test_bug_detection(client)),
+        run_and_save(test_code_refactoring(client)),
+        run_and_save(test_algorithm_implementation(client)),
+        run_and_save(test_complex_reasoning(client)),
+        run_and_save(test_multi_step_task(client)),
+        run_and_save(test_code_review(client)),
+        run_and_save(test_sql_optimisation(client)),
+        run_and_save(test_api_design(client)),
+        run_and_save(test_security_audit(client)),
+        run_and_save(test_architecture_decision(client)),
+    )
+
+    wall_time_ms = (time.perf_counter_ns() - gather_start_ns) // 1_000_000
+    await client.close()
+
+    # Rewrite in test order rather than completion order
+    by_name = {d["test_name"]: d for d in result_dicts}
+    results[:] = ordered
+    result_dicts[:] = [by_name[r.test_name] for r in ordered]
+    save_results(OUTPUT_PATH)
+    print(f"\nResults saved to: {OUTPUT_PATH}")
 
     # Summary
     print("\n" + "=" * 60)
@@ -433,6 +956,8 @@ def main() -> None:
     total_cost = 0.0
     total_tokens_in = 0
     total_tokens_out = 0
+    total_cache_read = 0
+    total_cache_creation = 0
     total_duration = 0
 
     for r in results:
@@ -440,19 +965,24 @@ def main() -> None:
         print(f"  Status: {'PASS' if r.success else 'FAIL'}")
         print(f"  Duration: {r.duration_ms}ms")
         print(f"  Tokens: {r.tokens_in} / {r.tokens_out}")
+        print(f"  Prompt cache: {r.cache_read_tokens} read / {r.cache_creation_tokens} written")
         print(f"  Cost: ${r.cost:.4f}")
 
         total_cost += r.cost
         total_tokens_in += r.tokens_in
         total_tokens_out += r.tokens_out
+        total_cache_read += r.cache_read_tokens
+        total_cache_creation += r.cache_creation_tokens
         total_duration += r.duration_ms
 
     print("\n" + "-" * 40)
     print(f"Total Cost: ${total_cost:.4f}")
     print(f"Total Tokens: {total_tokens_in} in / {total_tokens_out} out")
-    print(f"Total Duration: {total_duration}ms")
+    print(f"Total Prompt Cache: {total_cache_read} read / {total_cache_creation} written")
+    print(f"Wall Time: {wall_time_ms}ms")
+    print(f"Sum of Test Durations: {total_duration}ms")
     print(f"Tests Passed: {len([r for r in results if r.success])}/{len(results)}")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())